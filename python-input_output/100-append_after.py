@@ -2,6 +2,10 @@
 """
 Module that defines append_after function
 """
+import os
+import re
+import shutil
+import tempfile
 
 
 def append_after(filename="", search_string="", new_string=""):
@@ -9,16 +13,53 @@ def append_after(filename="", search_string="", new_string=""):
     Inserts a line of text to a file, after each line containing a specific
     string
 
+    The file is streamed line by line into a temporary file in the same
+    directory, which then replaces it with ``os.replace``. Memory use does
+    not depend on the file size, and a crash part way through leaves the
+    original file untouched.
+
     Args:
         filename: the name of the file
         search_string: the string to search for in each line
         new_string: the string to insert after lines containing search_string
     """
-    with open(filename, "r", encoding="utf-8") as f:
-        lines = f.readlines()
-
-    with open(filename, "w", encoding="utf-8") as f:
-        for line in lines:
-            f.write(line)
-            if search_string in line:
-                f.write(new_string)
+    append_after_many(filename, {search_string: new_string})
+
+
+def append_after_many(filename="", insertions=None):
+    """
+    Inserts text to a file after each line containing any of many strings,
+    reading and rewriting the file once
+
+    Every line is first matched against a single compiled alternation of
+    all the search strings; only lines that match it are checked string by
+    string. A line containing several search strings gets each of their
+    texts, in the order of `insertions`. Inserted text is not searched.
+
+    Args:
+        filename: the name of the file
+        insertions: a mapping of search strings to the text to insert
+            after lines containing them
+    """
+    rules = list((insertions or {}).items())
+    pattern = re.compile("|".join(re.escape(search) for search, new in rules)
+                         if rules else r"(?!)")
+    directory = os.path.dirname(os.path.abspath(filename))
+    with open(filename, "r", encoding="utf-8") as src:
+        fd, tmp_name = tempfile.mkstemp(dir=directory,
+                                        prefix=".append_after-")
+        try:
+            with open(fd, "w", encoding="utf-8") as dst:
+                for line in src:
+                    dst.write(line)
+                    if pattern.search(line):
+                        for search_string, new_string in rules:
+                            if search_string in line:
+                                dst.write(new_string)
+                dst.flush()
+                os.fsync(dst.fileno())
+            shutil.copymode(filename, tmp_name)
+            os.replace(tmp_name, filename)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
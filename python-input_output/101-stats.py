@@ -1,8 +1,70 @@
 #!/usr/bin/python3
 """
 Script that reads stdin line by line and computes metrics
+
+Input is read from the binary buffer in chunks of whole lines. Only the
+last two fields of each line are split off, and a chunk is decoded only
+when it holds bytes that ``str.split()`` would treat differently, so totals
+match a text-mode ``line.split()`` parser exactly.
+
+Log files can be given instead of stdin, including gzip-compressed
+``.gz`` ones. Plain files are split at line boundaries into byte ranges of
+about RANGE_SIZE bytes, the ranges and compressed files are parsed in a
+process pool, and the partial totals are merged. With ``--mmap FILE`` a
+single large file is memory-mapped and cut into blocks at newlines found
+with ``mmap.find``; the fields are parsed as bytes and never decoded.
+
+With ``--windows``, each report also gives requests/second, bytes/second
+and the p50/p95/p99 file sizes over the last 1, 5 and 15 minutes of
+input, kept in a ring of fixed time buckets with a mergeable quantile
+sketch per bucket, so memory stays bounded however long the stream runs.
+
+With ``--json`` each report is printed as one JSON object per line
+instead of text. With ``--metrics-port PORT`` the live counters are also
+served at ``/metrics`` in the Prometheus text format, from a background
+thread that reads them without taking any lock the parser waits on.
+
+Usage: ./101-stats.py [--every N] [--interval T] [--windows] < access.log
+       ./101-stats.py [--jobs J] access.log [access.log.1.gz ...]
+       ./101-stats.py [--every N] [--interval T] --mmap access.log
+       ./101-stats.py [--json] [--metrics-port PORT] < access.log
 """
+import argparse
+import gzip
+import json
+import math
+import mmap
+import os
 import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from operator import itemgetter, methodcaller
+
+CHUNK_SIZE = 1 << 16
+"""int: The number of bytes requested from the input per read."""
+
+RANGE_SIZE = 1 << 25
+"""int: The approximate size of the byte ranges plain files are split in."""
+
+MMAP_BLOCK_SIZE = 1 << 20
+"""int: The approximate size of the blocks a memory-mapped file is cut in."""
+
+WINDOWS = (60, 300, 900)
+"""tuple: The lengths in seconds of the windows metrics are reported over."""
+
+BUCKET_SECONDS = 10
+"""int: The time span covered by each bucket of the window ring."""
+
+QUANTILES = (0.5, 0.95, 0.99)
+"""tuple: The file size quantiles reported for each window."""
+
+# ASCII bytes that str.split() treats as separators but bytes.split()
+# does not.
+_SEPARATORS = (b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+_last_fields = methodcaller("rsplit", None, 2)
 
 
 def print_stats(total_size, status_counts):
@@ -13,31 +75,575 @@ def print_stats(total_size, status_counts):
             print("{}: {}".format(status_code, status_counts[status_code]))
 
 
+class QuantileSketch:
+    """
+    Log-bucketed histogram answering quantiles within a relative error.
+
+    A value v > 0 is counted in bucket ceil(log(v) / log(gamma)), so the
+    number of buckets grows with the logarithm of the value range only.
+    Values <= 0 share one bucket and are reported as 0. Sketches with the
+    same accuracy merge by adding bucket counts.
+    """
+    def __init__(self, accuracy=0.01):
+        self.accuracy = accuracy
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets = Counter()
+        self.count = 0
+
+    def update(self, values):
+        """Add values to the sketch"""
+        log_gamma = self.log_gamma
+        for value, count in Counter(values).items():
+            key = math.ceil(math.log(value) / log_gamma) if value > 0 \
+                else None
+            self.buckets[key] += count
+        self.count += len(values)
+
+    def merge(self, other):
+        """Add the counts of another sketch to this one"""
+        # Copy first: the other sketch may be updated by another thread.
+        self.buckets.update(dict(other.buckets))
+        self.count += other.count
+
+    def quantile(self, q):
+        """Return the value at quantile q (0 <= q <= 1), or None if empty"""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.buckets.get(None, 0)
+        if rank < seen:
+            return 0
+        for key in sorted(k for k in self.buckets if k is not None):
+            seen += self.buckets[key]
+            if rank < seen:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+        return None
+
+
+class WindowedStats:
+    """
+    Request and size metrics over sliding time windows.
+
+    Parsed lines are counted in a ring of buckets of BUCKET_SECONDS each,
+    long enough for the largest window; a bucket is reset when the ring
+    wraps around to it, so memory does not grow with the stream.
+    """
+    def __init__(self, windows=WINDOWS, bucket_seconds=BUCKET_SECONDS,
+                 clock=time.monotonic):
+        self.windows = windows
+        self.bucket_seconds = bucket_seconds
+        self.clock = clock
+        self.started = clock()
+        size = -(-max(windows) // bucket_seconds)
+        # Each bucket is [slot, requests, bytes, sketch].
+        self.ring = [[None, 0, 0, QuantileSketch()] for i in range(size)]
+
+    def _slot(self, now):
+        return int(now // self.bucket_seconds)
+
+    def update(self, file_sizes):
+        """Count parsed lines at the current time, given their file sizes"""
+        slot = self._slot(self.clock())
+        bucket = self.ring[slot % len(self.ring)]
+        if bucket[0] != slot:
+            bucket[:] = [slot, 0, 0, QuantileSketch()]
+        bucket[1] += len(file_sizes)
+        bucket[2] += sum(file_sizes)
+        bucket[3].update(file_sizes)
+
+    def summary(self, window):
+        """
+        Return the metrics of the last `window` seconds.
+
+        The window spans its whole buckets plus the part of the current
+        one elapsed so far, and rates are taken over exactly that time.
+
+        >>> t = [0.0]
+        >>> w = WindowedStats(clock=lambda: t[0])
+        >>> for i in range(6000):
+        ...     t[0] = i / 10
+        ...     w.update([1] * 10)
+        >>> t[0] = 600.0
+        >>> [round(w.summary(s)[0], 1) for s in WINDOWS]
+        [100.0, 100.0, 100.0]
+
+        Returns:
+            A tuple (requests/s, bytes/s, sketch of the file sizes).
+        """
+        now = self.clock()
+        last = self._slot(now)
+        first = last - window // self.bucket_seconds + 1
+        requests = size = 0
+        sketch = QuantileSketch()
+        for bucket in self.ring:
+            if bucket[0] is not None and first <= bucket[0] <= last:
+                requests += bucket[1]
+                size += bucket[2]
+                sketch.merge(bucket[3])
+        covered = now - first * self.bucket_seconds
+        seconds = max(min(covered, now - self.started), 1e-9)
+        return (requests / seconds, size / seconds, sketch)
+
+    def metrics(self):
+        """
+        Return the metrics of every window.
+
+        Returns:
+            A list of dictionaries with the window length in seconds, the
+            rates and the QUANTILES of the file sizes (None if no lines).
+        """
+        metrics = []
+        for window in self.windows:
+            rps, bps, sketch = self.summary(window)
+            metrics.append({
+                "window": window,
+                "requests_per_second": rps,
+                "bytes_per_second": bps,
+                "file_size_quantiles": {str(q): sketch.quantile(q)
+                                        for q in QUANTILES},
+            })
+        return metrics
+
+    def report(self):
+        """Print the metrics of every window"""
+        for metric in self.metrics():
+            quantiles = ["-" if value is None else "{:.0f}".format(value)
+                         for value in metric["file_size_quantiles"].values()]
+            print("Last {}m: {:.2f} req/s, {:.2f} B/s, "
+                  "p50 {}, p95 {}, p99 {}".format(
+                      metric["window"] // 60, metric["requests_per_second"],
+                      metric["bytes_per_second"], *quantiles))
+
+
+class Stats:
+    """
+    Running totals of the parsed log lines.
+
+    If `windows` is a WindowedStats, lines are also counted in it and its
+    metrics are printed with every report. `output` is "text" or "json".
+    """
+    def __init__(self, windows=None, output="text"):
+        self.total_size = 0
+        self.status_counts = {200: 0, 301: 0, 400: 0,
+                              401: 0, 403: 0, 404: 0, 405: 0, 500: 0}
+        self.line_count = 0
+        self.windows = windows
+        self.output = output
+
+    def update(self, status_codes, file_sizes):
+        """Count parsed lines, given their status codes and file sizes"""
+        self.total_size += sum(file_sizes)
+        self.line_count += len(status_codes)
+        for status_code, count in Counter(status_codes).items():
+            if status_code in self.status_counts:
+                self.status_counts[status_code] += count
+        if self.windows is not None:
+            self.windows.update(file_sizes)
+
+    def merge(self, other):
+        """Add the totals of another Stats to these"""
+        self.total_size += other.total_size
+        self.line_count += other.line_count
+        for status_code, count in other.status_counts.items():
+            self.status_counts[status_code] += count
+
+    def to_dict(self):
+        """Return the current statistics as a dictionary"""
+        stats = {
+            "file_size": self.total_size,
+            "lines": self.line_count,
+            "status_counts": {str(status_code): count for status_code, count
+                              in sorted(dict(self.status_counts).items())},
+        }
+        if self.windows is not None:
+            stats["windows"] = self.windows.metrics()
+        return stats
+
+    def report(self):
+        """Print the current statistics"""
+        if self.output == "json":
+            print(json.dumps(self.to_dict()))
+            return
+        print_stats(self.total_size, self.status_counts)
+        if self.windows is not None:
+            self.windows.report()
+
+
+def format_prometheus(stats):
+    """Return the statistics in the Prometheus text exposition format"""
+    current = stats.to_dict()
+    lines = [
+        "# HELP log_stats_lines_total Parsed log lines.",
+        "# TYPE log_stats_lines_total counter",
+        "log_stats_lines_total {}".format(current["lines"]),
+        "# HELP log_stats_file_size_bytes_total Sum of the file sizes.",
+        "# TYPE log_stats_file_size_bytes_total counter",
+        "log_stats_file_size_bytes_total {}".format(current["file_size"]),
+        "# HELP log_stats_status_total Parsed log lines by status code.",
+        "# TYPE log_stats_status_total counter",
+    ]
+    for status_code, count in current["status_counts"].items():
+        lines.append('log_stats_status_total{{code="{}"}} {}'.format(
+            status_code, count))
+    if "windows" in current:
+        windows = current["windows"]
+        lines += [
+            "# HELP log_stats_requests_per_second Lines per second over "
+            "a window.",
+            "# TYPE log_stats_requests_per_second gauge",
+        ]
+        lines += ['log_stats_requests_per_second{{window="{}"}} {}'.format(
+            metric["window"], metric["requests_per_second"])
+            for metric in windows]
+        lines += [
+            "# HELP log_stats_bytes_per_second File size per second over "
+            "a window.",
+            "# TYPE log_stats_bytes_per_second gauge",
+        ]
+        lines += ['log_stats_bytes_per_second{{window="{}"}} {}'.format(
+            metric["window"], metric["bytes_per_second"])
+            for metric in windows]
+        lines += [
+            "# HELP log_stats_file_size_bytes File size quantiles over "
+            "a window.",
+            "# TYPE log_stats_file_size_bytes gauge",
+        ]
+        lines += ['log_stats_file_size_bytes{{window="{}",quantile="{}"}} {}'
+                  .format(metric["window"], q, value)
+                  for metric in windows
+                  for q, value in metric["file_size_quantiles"].items()
+                  if value is not None]
+    return "\n".join(lines) + "\n"
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """
+    Serves the statistics of the server's `stats` at /metrics.
+    """
+    def do_GET(self):
+        """Answer a scrape"""
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = format_prometheus(self.server.stats).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Keep scrapes out of the output"""
+
+
+def serve_metrics(stats, port, host=""):
+    """
+    Serve the live statistics at /metrics from a background thread.
+
+    The counters are read as they are being updated; nothing is recomputed
+    and the parser never waits for a scrape.
+
+    Returns:
+        The running server.
+    """
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    server.stats = stats
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def iter_blocks(stream, chunk_size=CHUNK_SIZE, length=None):
+    """
+    Yield blocks of whole lines of a binary stream, reading it in chunks.
+
+    As with ``sys.stdin``, only "\\n" ends a line; a "\\r" is left in the
+    line, where it splits like any other whitespace.
+
+    Args:
+        stream: the binary stream to read
+        chunk_size: the number of bytes to request per read
+        length: the number of bytes to read; None reads to the end
+    """
+    read = getattr(stream, "read1", stream.read)
+    tail = b""
+    while length is None or length > 0:
+        if length is None:
+            chunk = read(chunk_size)
+        else:
+            chunk = read(min(chunk_size, length))
+            length -= len(chunk)
+        if not chunk:
+            break
+        end = chunk.rfind(b"\n") + 1
+        if end == 0:
+            tail += chunk
+            continue
+        yield tail + chunk[:end]
+        tail = chunk[end:]
+    if tail:
+        yield tail
+
+
+def is_plain(block):
+    """Return True if ``bytes.split()`` splits a block like ``str.split()``"""
+    return block.isascii() and not any(sep in block for sep in _SEPARATORS)
+
+
+def parse_line(line):
+    """
+    Return the (status_code, file_size) of a log line, or None.
+
+    Args:
+        line: the line, as bytes
+    """
+    if is_plain(line):
+        parts = line.rsplit(None, 2)
+    else:
+        parts = line.decode("utf-8", "surrogateescape").split()
+    if len(parts) <= 2:
+        return None
+    try:
+        return (int(parts[-2]), int(parts[-1]))
+    except ValueError:
+        return None
+
+
+def parse_block(block):
+    """
+    Return the status codes and file sizes of the lines of a block.
+
+    Plain blocks are converted a whole column at a time; a block holding
+    a malformed or non-ASCII line falls back to ``parse_line``.
+
+    Args:
+        block: whole lines, as bytes
+    Returns:
+        A tuple of two lists, in line order.
+    """
+    lines = block.split(b"\n")
+    if is_plain(block):
+        fields = [parts for parts in map(_last_fields, lines)
+                  if len(parts) > 2]
+        try:
+            return (list(map(int, map(itemgetter(1), fields))),
+                    list(map(int, map(itemgetter(2), fields))))
+        except ValueError:
+            pass
+    records = [record for record in map(parse_line, lines) if record]
+    return ([record[0] for record in records],
+            [record[1] for record in records])
+
+
+def consume(blocks, stats, every=10, interval=None):
+    """
+    Add the records of blocks of lines to the statistics, reporting as it
+    goes.
+
+    Args:
+        blocks: an iterable of blocks of whole lines, as bytes
+        stats: the Stats to update
+        every: report after every `every` parsed lines; 0 disables it
+        interval: report when `interval` seconds have passed since the
+            last report, checked once per block; None disables it
+    """
+    last_report = time.monotonic()
+    for block in blocks:
+        status_codes, file_sizes = parse_block(block)
+        start = 0
+        while start < len(status_codes):
+            stop = len(status_codes)
+            if every:
+                stop = min(stop, start + every - stats.line_count % every)
+            stats.update(status_codes[start:stop], file_sizes[start:stop])
+            start = stop
+            if every and stats.line_count % every == 0:
+                stats.report()
+        if interval is not None and \
+                time.monotonic() - last_report >= interval:
+            stats.report()
+            last_report = time.monotonic()
+
+
+def iter_mmap_blocks(path, block_size=MMAP_BLOCK_SIZE):
+    """
+    Yield blocks of whole lines of a memory-mapped log file.
+
+    Each block ends at the first newline past `block_size` bytes, so only
+    one block at a time is copied out of the mapping.
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, "madvise"):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            start = 0
+            while start < len(mm):
+                end = mm.find(b"\n", start + block_size) + 1 or len(mm)
+                yield mm[start:end]
+                start = end
+
+
+def open_log(path):
+    """Open a log file for binary reading, decompressing ``.gz`` files"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def split_ranges(path, range_size=RANGE_SIZE):
+    """
+    Split a log file into byte ranges that start and end on line boundaries.
+
+    Returns:
+        A list of (path, start, length) tuples covering the whole file;
+        compressed files are a single range of unknown length.
+    """
+    if path.endswith(".gz"):
+        return [(path, 0, None)]
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as f:
+        while starts[-1] + range_size < size:
+            f.seek(starts[-1] + range_size)
+            f.readline()
+            if f.tell() >= size:
+                break
+            starts.append(f.tell())
+    ends = starts[1:] + [size]
+    return [(path, start, end - start) for start, end in zip(starts, ends)]
+
+
+def scan_range(path, start, length):
+    """
+    Parse a byte range of a log file.
+
+    Returns:
+        A Stats holding the totals of the range.
+    """
+    stats = Stats()
+    with open_log(path) as f:
+        if start:
+            f.seek(start)
+        for block in iter_blocks(f, length=length):
+            stats.update(*parse_block(block))
+    return stats
+
+
+def scan_files(paths, jobs, stats=None, range_size=RANGE_SIZE):
+    """
+    Parse log files in a pool of `jobs` processes.
+
+    Args:
+        stats: the Stats the totals are merged into as ranges complete;
+            a new one if None
+    Returns:
+        The Stats holding the merged totals of all the files.
+    """
+    ranges = [r for path in paths for r in split_ranges(path, range_size)]
+    if stats is None:
+        stats = Stats()
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        for partial in pool.map(scan_range, *zip(*ranges)):
+            stats.merge(partial)
+    return stats
+
+
+def non_negative(value):
+    """argparse type for a non-negative integer"""
+    try:
+        number = int(value)
+    except ValueError:
+        number = -1
+    if number < 0:
+        raise argparse.ArgumentTypeError(
+            "expected a non-negative integer, got {!r}".format(value))
+    return number
+
+
+def positive_float(value):
+    """argparse type for a finite number of seconds greater than 0"""
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not (0 < number < math.inf):
+        raise argparse.ArgumentTypeError(
+            "expected a positive number, got {!r}".format(value))
+    return number
+
+
+def parse_args(argv=None):
+    """Parse the command line"""
+    parser = argparse.ArgumentParser(
+        description="Compute metrics from access log lines on stdin or "
+                    "in log files.")
+    parser.add_argument("files", nargs="*", metavar="FILE",
+                        help="log files to read instead of stdin; "
+                             "names ending in .gz are decompressed")
+    parser.add_argument("--jobs", type=int, default=1, metavar="J",
+                        help="worker processes used for log files; with "
+                             "more than one, only the final totals are "
+                             "printed (default: 1)")
+    parser.add_argument("--windows", action="store_true",
+                        help="also report rates and file size percentiles "
+                             "over the last 1, 5 and 15 minutes")
+    parser.add_argument("--mmap", metavar="FILE",
+                        help="memory-map an uncompressed log file and "
+                             "read it instead of stdin")
+    parser.add_argument("--json", action="store_true",
+                        help="print each report as a line of JSON")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        metavar="PORT",
+                        help="serve live Prometheus metrics at /metrics "
+                             "on PORT")
+    parser.add_argument("--every", type=non_negative, default=None,
+                        metavar="N",
+                        help="report every N lines, 0 to disable "
+                             "(default: 10)")
+    parser.add_argument("--interval", type=positive_float, default=None,
+                        metavar="T", help="report every T seconds")
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.mmap and args.files:
+        parser.error("--mmap cannot be combined with FILE arguments")
+    if args.jobs > 1 and args.files:
+        for given, option in ((args.windows, "--windows"),
+                              (args.every, "--every"),
+                              (args.interval is not None, "--interval")):
+            if given:
+                parser.error("{} cannot be used with --jobs above 1"
+                             .format(option))
+    if args.every is None:
+        args.every = 10
+    return args
+
+
 if __name__ == "__main__":
-    total_size = 0
-    status_counts = {200: 0, 301: 0, 400: 0,
-                     401: 0, 403: 0, 404: 0, 405: 0, 500: 0}
-    line_count = 0
+    args = parse_args()
+    stats = Stats(WindowedStats() if args.windows else None,
+                  "json" if args.json else "text")
+    if args.metrics_port is not None:
+        serve_metrics(stats, args.metrics_port)
 
     try:
-        for line in sys.stdin:
-            try:
-                parts = line.split()
-                if len(parts) > 2:
-                    status_code = int(parts[-2])
-                    file_size = int(parts[-1])
-
-                    total_size += file_size
-                    line_count += 1
-
-                    if status_code in status_counts:
-                        status_counts[status_code] += 1
-
-                    if line_count % 10 == 0:
-                        print_stats(total_size, status_counts)
-            except (ValueError, IndexError):
-                pass
+        if args.mmap:
+            consume(iter_mmap_blocks(args.mmap), stats,
+                    args.every, args.interval)
+        elif not args.files:
+            consume(iter_blocks(sys.stdin.buffer), stats,
+                    args.every, args.interval)
+        elif args.jobs > 1:
+            scan_files(args.files, args.jobs, stats)
+        else:
+            for path in args.files:
+                with open_log(path) as f:
+                    consume(iter_blocks(f), stats, args.every,
+                            args.interval)
     except KeyboardInterrupt:
         pass
 
-    print_stats(total_size, status_counts)
+    stats.report()
@@ -3,6 +3,8 @@
 11-student.py
 Module containing class Student.
 """
+from functools import lru_cache
+from operator import attrgetter
 
 
 class Student:
@@ -35,3 +37,69 @@ class Student:
             self.last_name = json['last_name']
         if "age" in json:
             self.age = json['age']
+
+
+FIELDS = ("first_name", "last_name", "age")
+
+
+@lru_cache(maxsize=256)
+def compile_to_json(attrs):
+    """
+    Returns a function building the to_json dictionary of a SlottedStudent
+    for a tuple of attribute names, made once per tuple.
+    """
+    keys = tuple(name for name in dict.fromkeys(attrs) if name in FIELDS)
+    if not keys:
+        return lambda student: {}
+    getter = attrgetter(*keys)
+    if len(keys) == 1:
+        return lambda student: {keys[0]: getter(student)}
+    return lambda student: dict(zip(keys, getter(student)))
+
+
+def _to_json_key(attrs):
+    """Returns the compile_to_json key for the attrs given to to_json."""
+    if isinstance(attrs, list) and \
+            all(isinstance(element, str) for element in attrs):
+        return tuple(attrs)
+    return FIELDS
+
+
+class SlottedStudent:
+    """
+    A Student stored in __slots__ instead of a __dict__.
+
+    to_json returns the same dictionaries as Student.to_json, built by a
+    compiled extractor cached per tuple of attribute names.
+    """
+    __slots__ = FIELDS
+
+    def __init__(self, first_name, last_name, age):
+        self.first_name = first_name
+        self.last_name = last_name
+        self.age = age
+
+    def to_json(self, attrs=None):
+        return compile_to_json(_to_json_key(attrs))(self)
+
+    def reload_from_json(self, json):
+        for key in json.keys() & FIELDS:
+            setattr(self, key, json[key])
+
+
+def to_json_many(students, attrs=None):
+    """
+    Returns the to_json dictionaries of many students, validating `attrs`
+    and looking up the extractor once for the whole batch.
+    """
+    extract = compile_to_json(_to_json_key(attrs))
+    return [extract(student) if type(student) is SlottedStudent
+            else student.to_json(attrs) for student in students]
+
+
+def reload_many(students, jsons):
+    """
+    Reloads each student from the dictionary at the same position.
+    """
+    for student, json in zip(students, jsons):
+        student.reload_from_json(json)
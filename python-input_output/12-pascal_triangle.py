@@ -3,21 +3,82 @@
 12-pascal_triangle.py
 Module containing function to create a representation of a Pascal triangle.
 """
+from array import array
+from operator import add
 
 
-def pascal_triangle(n):
+def iter_pascal_rows(n, mod=None):
+    """
+    Yields the first n rows of a Pascal triangle, one at a time.
+
+    Each row is built from the previous one alone, so only two rows are
+    held in memory at once. With `mod`, every entry is reduced modulo
+    `mod` and the rows are compact array('q') of machine integers.
+    """
+    if mod is None:
+        row = [1]
+        for k in range(n):
+            yield row
+            row = [1] + list(map(add, row, row[1:])) + [1]
+        return
+
+    if not isinstance(mod, int) or not 0 < mod < 2 ** 63:
+        raise ValueError("mod must be an integer between 1 and 2**63 - 1")
+    one = 1 % mod
+    row = array('q', [one])
+    for k in range(n):
+        yield row
+        new_row = array('q', [one])
+        new_row.extend([(a + b) % mod for a, b in zip(row, row[1:])])
+        new_row.append(one)
+        row = new_row
+
+
+def binomial_mod(n, k, p):
+    """
+    Returns C(n, k) modulo a prime p, using Lucas' theorem.
+
+    C(n, k) is the product of the binomials of the base-p digits of n and
+    k, so no row of the triangle is built.
+    """
+    if k < 0 or k > n:
+        return 0
+    result = 1 % p
+    while k:
+        n_digit, k_digit = n % p, k % p
+        if k_digit > n_digit:
+            return 0
+        k_digit = min(k_digit, n_digit - k_digit)
+        numerator = denominator = 1
+        for i in range(k_digit):
+            numerator = numerator * (n_digit - i) % p
+            denominator = denominator * (i + 1) % p
+        result = result * numerator * pow(denominator, p - 2, p) % p
+        n //= p
+        k //= p
+    return result
+
+
+def pascal_row(k):
+    """
+    Returns row k (counting from 0) of a Pascal triangle.
+
+    The row is computed directly with the multiplicative formula
+    C(k, i) = C(k, i - 1) * (k - i + 1) / i, without the rows above it.
+    """
+    if k < 0:
+        return []
+    row = [1]
+    for i in range(1, k + 1):
+        row.append(row[-1] * (k - i + 1) // i)
+    return row
+
+
+def pascal_triangle(n, mod=None):
     """
     Creates a Pascal triangle of n.
+
+    With `mod`, the entries are reduced modulo `mod` and each row is an
+    array('q').
     """
-    triangle = []
-    if n > 0:
-        for row in range(n):
-            numbers = [1]
-            for i in range(1, row):
-                sum = triangle[row - 1][i - 1] + triangle[row - 1][i]
-                numbers.append(sum)
-            if row > 0:
-                numbers.append(1)
-            triangle.append(numbers)
-
-    return triangle
+    return list(iter_pascal_rows(n, mod))
@@ -6,13 +6,59 @@ function that writes an Object
 to a text file, using a JSON representation
 '''
 import json
+import os
+import shutil
+import tempfile
 
+BUFFER_SIZE = 1 << 20
 
-def save_to_json_file(my_obj, filename):
+
+def save_to_json_file(my_obj, filename, atomic=False, stream=False):
     """
     Function writing an object as a JSON to a file.
+
+    By default the JSON text is built with ``json.dumps``, which uses the
+    fast C encoder. With `stream`, it is instead encoded chunk by chunk
+    with ``JSONEncoder.iterencode`` straight into a file with a large
+    write buffer, so the whole string is never built in memory; that
+    encoder is pure Python and about four times slower, so it only pays
+    off when the text would not fit in memory comfortably. With `atomic`,
+    it is written to a temporary file in the same directory that then
+    replaces `filename`, so readers never see a partial file.
+
+    Returns:
+        The number of characters written.
     """
-    with open(filename, 'w', encoding="UTF-8") as f:
-        n = f.write(json.dumps(my_obj))
+    if not atomic:
+        with open(filename, 'w', encoding="UTF-8",
+                  buffering=BUFFER_SIZE) as f:
+            return _write_json(f, my_obj, stream)
+
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_name = tempfile.mkstemp(dir=directory, prefix=".json-")
+    try:
+        with open(fd, 'w', encoding="UTF-8", buffering=BUFFER_SIZE) as f:
+            n = _write_json(f, my_obj, stream)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(filename):
+            shutil.copymode(filename, tmp_name)
+        else:
+            umask = os.umask(0)
+            os.umask(umask)
+            os.chmod(tmp_name, 0o666 & ~umask)
+        os.replace(tmp_name, filename)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+    return n
+
 
+def _write_json(f, my_obj, stream):
+    """Write the JSON text of an object to a file, counting characters."""
+    if not stream:
+        return f.write(json.dumps(my_obj))
+    n = 0
+    for chunk in json.JSONEncoder().iterencode(my_obj):
+        n += f.write(chunk)
     return n
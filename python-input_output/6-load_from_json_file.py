@@ -6,6 +6,10 @@ Module containing function to
 create an object from a JSON file.
 """
 import json
+import re
+
+_NON_SPACE = re.compile(r"[^ \t\n\r]")
+_DELIMITERS = (" ", "\t", "\n", "\r", ",", "]")
 
 
 def load_from_json_file(filename):
@@ -15,3 +19,71 @@ def load_from_json_file(filename):
     with open(filename, 'r', encoding="utf-8") as f:
         string = f.read()
     return json.loads(string)
+
+
+def iter_json_array(filename, buffer_size=1 << 16):
+    """
+    Function yielding the elements of a JSON array file one at a time.
+
+    The file is read `buffer_size` characters at a time and each element
+    is parsed with ``json.JSONDecoder.raw_decode``, so memory holds one
+    buffer and one element rather than the whole file and object. The
+    buffer only grows past `buffer_size` for an element larger than it.
+
+    Raises:
+        json.JSONDecodeError: if the file is not a well-formed JSON array.
+    """
+    decoder = json.JSONDecoder()
+    with open(filename, 'r', encoding="utf-8") as f:
+        buf = ""
+        pos = 0
+        eof = False
+
+        def next_token():
+            """Skip whitespace, reading more input as needed."""
+            nonlocal buf, pos, eof
+            while True:
+                match = _NON_SPACE.search(buf, pos)
+                if match:
+                    pos = match.start()
+                    return buf[pos]
+                if eof:
+                    pos = len(buf)
+                    return ""
+                chunk = f.read(buffer_size)
+                buf, pos, eof = chunk, 0, not chunk
+
+        if next_token() != "[":
+            raise json.JSONDecodeError("Expecting '['", buf, pos)
+        pos += 1
+        if next_token() == "]":
+            pos += 1
+        else:
+            while True:
+                next_token()
+                while True:
+                    try:
+                        element, end = decoder.raw_decode(buf, pos)
+                    except json.JSONDecodeError:
+                        if eof:
+                            raise
+                        end = None
+                    # A value not followed by a delimiter may be cut short
+                    # at the end of the buffer (e.g. "1e" of "1e5"), so
+                    # read on before trusting it.
+                    if end is not None and \
+                            (eof or buf[end:end + 1] in _DELIMITERS):
+                        break
+                    chunk = f.read(buffer_size)
+                    buf, pos, eof = buf[pos:] + chunk, 0, not chunk
+                pos = end
+                yield element
+                token = next_token()
+                pos += 1
+                if token == "]":
+                    break
+                if token != ",":
+                    raise json.JSONDecodeError("Expecting ',' delimiter",
+                                               buf, pos - 1)
+        if next_token():
+            raise json.JSONDecodeError("Extra data", buf, pos)
@@ -3,21 +3,172 @@
 """
 7-add_item.py
 Script adding all arguments to a list saved as a file.
+
+Usage:
+    ./7-add_item.py [item ...]           rewrite the list in add_item.json
+    ./7-add_item.py --jsonl [item ...]   append the items to add_item.jsonl
+    ./7-add_item.py --compact            move add_item.jsonl into the list
+
+In JSON-lines mode each call appends one record per item under a file
+lock, followed by fsync, so its cost does not grow with the file. Compaction
+rebuilds the classic JSON array in add_item.json when it is needed.
 """
+import fcntl
 import json
+import os
+import shutil
 import sys
 save_to_json_file = __import__('5-save_to_json_file').save_to_json_file
 load_from_json_file = __import__('6-load_from_json_file').load_from_json_file
 
+FILENAME = "add_item.json"
+JSONL_FILENAME = "add_item.jsonl"
+
+
+def append_jsonl(items, filename=JSONL_FILENAME):
+    """
+    Appends items to a JSON-lines file, one record per line, followed by
+    fsync.
+
+    The file is locked exclusively while writing, so compaction cannot
+    claim it in the middle of an append; if it was claimed while waiting
+    for the lock, the newly created file is opened instead. A torn last
+    line left by a crash is cut off before appending.
+    """
+    data = "".join(json.dumps(item) + "\n" for item in items)
+    fd = _open_locked(filename)
+    try:
+        _drop_torn_tail(fd)
+        view = memoryview(data.encode("utf-8"))
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _open_locked(filename):
+    """
+    Opens `filename` for appending with an exclusive lock, making sure the
+    locked file is still the one at `filename`.
+    """
+    while True:
+        fd = os.open(filename, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            st = os.stat(filename)
+        except FileNotFoundError:
+            st = None
+        locked = os.fstat(fd)
+        if st is not None and (st.st_dev, st.st_ino) == \
+                (locked.st_dev, locked.st_ino):
+            return fd
+        os.close(fd)
+
+
+def _drop_torn_tail(fd):
+    """Truncates a locked file after its last newline."""
+    end = os.fstat(fd).st_size
+    if end == 0 or os.pread(fd, 1, end - 1) == b"\n":
+        return
+    pos = end
+    while pos > 0:
+        start = max(pos - 4096, 0)
+        newline = os.pread(fd, pos - start, start).rfind(b"\n")
+        if newline >= 0:
+            os.ftruncate(fd, start + newline + 1)
+            return
+        pos = start
+    os.ftruncate(fd, 0)
+
+
+def iter_jsonl(filename=JSONL_FILENAME):
+    """
+    Yields the records of a JSON-lines file one at a time; yields nothing
+    if the file does not exist. A last line without a newline is the
+    remains of an interrupted append and is skipped.
+    """
+    try:
+        f = open(filename, 'r', encoding="utf-8")
+    except FileNotFoundError:
+        return
+    with f:
+        for line in f:
+            if line.strip() and line.endswith("\n"):
+                yield json.loads(line)
+
+
+def compact(filename=FILENAME, jsonl_filename=JSONL_FILENAME):
+    """
+    Appends the records of the JSON-lines file to the list saved in
+    `filename`, then removes the JSON-lines file.
+
+    The JSON-lines file is first renamed to a claimed name, under the same
+    lock as appends, so records appended meanwhile go to a new file and
+    wait for the next compaction. The merged list is staged in its own
+    file before the claimed one is removed, so an interrupted compaction
+    can simply be run again: it neither loses nor duplicates records.
+    """
+    claimed = jsonl_filename + ".compacting"
+    staged = filename + ".new"
+    if os.path.exists(staged):
+        _finish_compaction(filename, claimed, staged)
+    if os.path.exists(claimed):
+        _merge_claimed(filename, claimed, staged)
+    try:
+        fd = os.open(jsonl_filename, os.O_RDONLY)
+    except FileNotFoundError:
+        pass
+    else:
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            os.replace(jsonl_filename, claimed)
+        finally:
+            os.close(fd)
+    _merge_claimed(filename, claimed, staged)
+
+
+def _merge_claimed(filename, claimed, staged):
+    """
+    Stages the list of `filename` extended with the claimed records, then
+    puts it in place.
+    """
+    try:
+        my_list = load_from_json_file(filename)
+    except FileNotFoundError:
+        my_list = []
+    my_list.extend(iter_jsonl(claimed))
+    save_to_json_file(my_list, staged, atomic=True)
+    if os.path.exists(filename):
+        shutil.copymode(filename, staged)
+    _finish_compaction(filename, claimed, staged)
+
+
+def _finish_compaction(filename, claimed, staged):
+    """
+    Drops the claimed records, already in the staged list, and moves the
+    staged list over `filename`.
+    """
+    if os.path.exists(claimed):
+        os.remove(claimed)
+    os.replace(staged, filename)
+
 
 def main():
     """
     Adds all command-line arguments to a list saved as a file.
     """
+    if len(sys.argv) > 1 and sys.argv[1] == "--jsonl":
+        append_jsonl(sys.argv[2:])
+        return
+    if len(sys.argv) > 1 and sys.argv[1] == "--compact":
+        compact()
+        return
+
     if len(sys.argv) < 2:
         my_list = []
 
-    filename = "add_item.json"
+    filename = FILENAME
     try:
         my_list = load_from_json_file(filename)
     except FileNotFoundError:
@@ -4,6 +4,7 @@
 Module containing function to create
 a dictionary description from an object.
 """
+import json
 
 
 def class_to_json(obj):
@@ -11,3 +12,49 @@ def class_to_json(obj):
     Function creating a dictionary description from an object.
     """
     return obj.__dict__
+
+
+def class_to_json_columns(objs, f, jsonl=False):
+    """
+    Function writing many same-typed objects to a file in columns.
+
+    The attribute names are written once in a shared key table, followed
+    by one list of values per attribute, instead of one dictionary (and
+    one copy of every key) per object.
+
+    As JSON, the file holds ``{"keys": [...], "columns": [[...], ...]}``.
+    As JSON lines, the first line is ``{"keys": [...]}`` and each following
+    line is the column of the key at the same position.
+
+    Args:
+        objs: an iterable of objects with the same attributes
+        f: a text file open for writing
+        jsonl: write JSON lines instead of a single JSON object
+    Raises:
+        ValueError: if the objects do not all have the same attributes.
+    Returns:
+        The number of objects written.
+    """
+    keys = None
+    columns = []
+    count = 0
+    for obj in objs:
+        attributes = class_to_json(obj)
+        if keys is None:
+            keys = list(attributes)
+            columns = [[] for key in keys]
+        elif len(attributes) != len(keys) or \
+                any(key not in attributes for key in keys):
+            raise ValueError("objects must have the same attributes")
+        for key, column in zip(keys, columns):
+            column.append(attributes[key])
+        count += 1
+
+    keys = keys or []
+    if jsonl:
+        f.write(json.dumps({"keys": keys}) + "\n")
+        for column in columns:
+            f.write(json.dumps(column) + "\n")
+    else:
+        json.dump({"keys": keys, "columns": columns}, f)
+    return count
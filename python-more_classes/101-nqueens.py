@@ -8,6 +8,9 @@ N non-attacking queens on an NxN chessboard.
 
 Example:
     $ ./101-nqueens.py N
+    $ ./101-nqueens.py --jobs 8 N
+    $ ./101-nqueens.py --count N
+    $ ./101-nqueens.py --limit K N
 
 N must be an integer greater than or equal to 4.
 
@@ -15,11 +18,26 @@ Attributes:
     board (list): A list of lists representing the chessboard.
     solutions (list): A list of lists containing solutions.
 
+The command line streams solutions from `bitmask_iter`, or from
+`parallel_iter` with `--jobs`; both track occupied columns and diagonals
+as integer bitmasks so each placement is O(1) and copy-free.
+The board-based `recursive_solve` is kept for reference. With `--jobs J`
+the search tree is split by the queens of the first one or two rows and the
+subtrees are solved in a pool of `J` processes. With `--count` only the
+number of solutions is printed; no solution lists are built and the mirror
+symmetry of the board halves the search. Solutions are streamed to stdout
+as they are found; `--limit K` stops after the first `K` of them.
+
 Solutions are represented in the format [[r, c], [r, c], [r, c], [r, c]]
 where `r` and `c` represent the row and column, respectively, where a
 queen must be placed on the chessboard.
 """
+import functools
+import itertools
+import os
 import sys
+import time
+from multiprocessing import Pool
 
 
 def init_board(n):
@@ -127,18 +145,285 @@ def recursive_solve(board, row, queens, solutions):
     return (solutions)
 
 
-if __name__ == "__main__":
-    if len(sys.argv) != 2:
+def bitmask_iter(n, row, cols, ldiag, rdiag, placed):
+    """Yield the solutions of an N-queens puzzle from an explicit stack.
+
+    Bit `c` of each mask stands for column `c` of the current row, so
+    free squares are visited in the same order as `recursive_solve`.
+    The masks of each row are kept in flat lists instead of a chain of
+    generators, so yielding a solution does not cost one step per row.
+
+    Args:
+        n (int): The size of the chessboard.
+        row (int): The current working row.
+        cols (int): Mask of columns already holding a queen.
+        ldiag (int): Mask of squares attacked along down-right diagonals.
+        rdiag (int): Mask of squares attacked along down-left diagonals.
+        placed (list): The column of the queen placed in each row so far.
+    Yields:
+        Each solution as soon as it is found.
+    """
+    if row == n:
+        yield [[r, placed[r]] for r in range(n)]
+        return
+
+    full = (1 << n) - 1
+    last = n - 1
+    col_masks = [0] * n
+    ldiag_masks = [0] * n
+    rdiag_masks = [0] * n
+    frees = [0] * n
+    col_masks[row], ldiag_masks[row], rdiag_masks[row] = cols, ldiag, rdiag
+    frees[row] = full & ~(cols | ldiag | rdiag)
+    r = row
+    while r >= row:
+        free = frees[r]
+        if not free:
+            r -= 1
+            continue
+        bit = free & -free
+        frees[r] = free ^ bit
+        placed[r] = bit.bit_length() - 1
+        if r == last:
+            yield [[i, placed[i]] for i in range(n)]
+            continue
+        cols = col_masks[r] | bit
+        ldiag = ((ldiag_masks[r] | bit) << 1) & full
+        rdiag = (rdiag_masks[r] | bit) >> 1
+        r += 1
+        col_masks[r], ldiag_masks[r], rdiag_masks[r] = cols, ldiag, rdiag
+        frees[r] = full & ~(cols | ldiag | rdiag)
+
+
+def bitmask_solve(n, row, cols, ldiag, rdiag, placed, solutions):
+    """Solve an N-queens puzzle using integer bitmasks.
+
+    Args:
+        See `bitmask_iter`.
+        solutions (list): A list of lists of solutions.
+    Returns:
+        solutions
+    """
+    solutions.extend(bitmask_iter(n, row, cols, ldiag, rdiag, placed))
+    return (solutions)
+
+
+def bitmask_count(n, cols, ldiag, rdiag):
+    """Count the solutions below a partial placement without listing them.
+
+    Args:
+        n (int): The size of the chessboard.
+        cols (int): Mask of columns already holding a queen.
+        ldiag (int): Mask of squares attacked along down-right diagonals.
+        rdiag (int): Mask of squares attacked along down-left diagonals.
+    Returns:
+        The number of solutions.
+    """
+    full = (1 << n) - 1
+    if cols == full:
+        return (1)
+
+    count = 0
+    free = full & ~(cols | ldiag | rdiag)
+    while free:
+        bit = free & -free
+        free ^= bit
+        count += bitmask_count(n, cols | bit, ((ldiag | bit) << 1) & full,
+                               (rdiag | bit) >> 1)
+    return (count)
+
+
+def prefix_weight(n, prefix):
+    """Return how many solutions each solution below `prefix` stands for.
+
+    Every solution has a mirror image with the first-row queen in column
+    n - 1 - c, so only the left half of the first row is searched and
+    counted twice. On odd boards the middle column is its own mirror and
+    is counted once.
+    """
+    if prefix[0] < n // 2:
+        return (2)
+    if prefix[0] == n // 2 and n % 2 == 1:
+        return (1)
+    return (0)
+
+
+def count_prefix(n, prefix):
+    """Return the weighted solution count below a prefix of queens."""
+    return (prefix_weight(n, prefix) *
+            bitmask_count(n, *place_prefix(n, prefix)))
+
+
+def count_solutions(n, jobs=1):
+    """Count the solutions of an N-queens puzzle in O(N) memory.
+
+    Args:
+        n (int): The size of the chessboard.
+        jobs (int): The number of worker processes to use.
+    """
+    prefixes = [p for p in split_prefixes(n, jobs)
+                if prefix_weight(n, p)]
+    if jobs > 1:
+        with Pool(jobs) as pool:
+            return (sum(pool.imap_unordered(
+                functools.partial(count_prefix, n), prefixes)))
+    return (sum(count_prefix(n, p) for p in prefixes))
+
+
+def place_prefix(n, prefix):
+    """Place queens in the first rows of a board.
+
+    Args:
+        n (int): The size of the chessboard.
+        prefix (tuple): The column of the queen in each of the first rows.
+    Returns:
+        The (cols, ldiag, rdiag) masks for the next row, or None if two
+        queens of the prefix attack each other.
+    """
+    full = (1 << n) - 1
+    cols = ldiag = rdiag = 0
+    for c in prefix:
+        bit = 1 << c
+        if (cols | ldiag | rdiag) & bit:
+            return (None)
+        cols |= bit
+        ldiag = ((ldiag | bit) << 1) & full
+        rdiag = (rdiag | bit) >> 1
+    return (cols, ldiag, rdiag)
+
+
+def split_prefixes(n, jobs):
+    """Return the valid first-row prefixes to hand out to `jobs` workers.
+
+    One row is enough when it gives every worker a few subtrees; otherwise
+    the first two rows are used. Prefixes come out in the serial order.
+    """
+    depth = 1 if n >= 4 * jobs else 2
+    return ([p for p in itertools.product(range(n), repeat=depth)
+             if place_prefix(n, p) is not None])
+
+
+def solve_prefix(n, prefix):
+    """Solve the subtree below a prefix of placed queens.
+
+    Returns:
+        A tuple (pid, seconds, solutions) describing the work done.
+    """
+    start = time.perf_counter()
+    cols, ldiag, rdiag = place_prefix(n, prefix)
+    placed = list(prefix) + [0] * (n - len(prefix))
+    solutions = bitmask_solve(n, len(prefix), cols, ldiag, rdiag,
+                              placed, [])
+    return (os.getpid(), time.perf_counter() - start, solutions)
+
+
+def parallel_iter(n, jobs):
+    """Yield the solutions of an N-queens puzzle solved by `jobs` processes.
+
+    Subtree results are yielded in prefix order as soon as each one is
+    ready, so the solutions come out exactly as `bitmask_iter` yields them.
+    Closing the generator early terminates the workers. A per-worker
+    timing summary is written to stderr when it finishes.
+    """
+    prefixes = split_prefixes(n, jobs)
+    workers = {}
+    try:
+        with Pool(jobs) as pool:
+            for pid, seconds, found in pool.imap(
+                    functools.partial(solve_prefix, n), prefixes):
+                tasks, total, count = workers.get(pid, (0, 0.0, 0))
+                workers[pid] = (tasks + 1, total + seconds,
+                                count + len(found))
+                yield from found
+    finally:
+        for pid, (tasks, total, count) in sorted(workers.items()):
+            print("worker {}: {} subtrees, {} solutions, {:.3f}s".format(
+                pid, tasks, count, total), file=sys.stderr)
+
+
+def parallel_solve(n, jobs):
+    """Solve an N-queens puzzle in a pool of `jobs` processes."""
+    return (list(parallel_iter(n, jobs)))
+
+
+def write_solutions(solutions, out, limit=None):
+    """Write solutions to a buffered stream, one per line.
+
+    The stream is flushed after the first solution so consumers see output
+    right away; the rest is left to the stream's own buffering.
+
+    Args:
+        solutions (iterable): The solutions to write.
+        out (file): The stream to write to.
+        limit (int): The maximum number of solutions to write.
+    Returns:
+        The number of solutions written.
+    """
+    written = 0
+    for sol in itertools.islice(solutions, limit):
+        out.write("{}\n".format(sol))
+        written += 1
+        if written == 1:
+            out.flush()
+    out.flush()
+    return (written)
+
+
+def pop_number(args, option, minimum):
+    """Remove `option` and its integer value from `args`.
+
+    Returns:
+        The value, or None if the option is absent.
+    """
+    if option not in args:
+        return (None)
+    i = args.index(option)
+    if i + 1 >= len(args) or not args[i + 1].isdigit() or \
+            int(args[i + 1]) < minimum:
+        print("{} must be a positive number".format(option.lstrip("-")))
+        sys.exit(1)
+    value = int(args[i + 1])
+    del args[i:i + 2]
+    return (value)
+
+
+def parse_args(argv):
+    """Parse the command line, exiting with a message on bad input.
+
+    Returns:
+        A tuple (n, jobs, count, limit).
+    """
+    args = list(argv[1:])
+    count = "--count" in args
+    if count:
+        args.remove("--count")
+    jobs = pop_number(args, "--jobs", 1) or 1
+    limit = pop_number(args, "--limit", 1)
+    if len(args) != 1:
         print("Usage: nqueens N")
         sys.exit(1)
-    if sys.argv[1].isdigit() is False:
+    if args[0].isdigit() is False:
         print("N must be a number")
         sys.exit(1)
-    if int(sys.argv[1]) < 4:
+    if int(args[0]) < 4:
         print("N must be at least 4")
         sys.exit(1)
+    return (int(args[0]), jobs, count, limit)
 
-    board = init_board(int(sys.argv[1]))
-    solutions = recursive_solve(board, 0, 0, [])
-    for sol in solutions:
-        print(sol)
+
+if __name__ == "__main__":
+    n, jobs, count, limit = parse_args(sys.argv)
+    if count:
+        print(count_solutions(n, jobs))
+        sys.exit(0)
+    if jobs > 1:
+        solutions = parallel_iter(n, jobs)
+    else:
+        solutions = bitmask_iter(n, 0, 0, 0, 0, [0] * n)
+    try:
+        write_solutions(solutions, sys.stdout, limit)
+    except BrokenPipeError:
+        # The reader went away (e.g. `| head`); stop quietly.
+        sys.stdout = open(os.devnull, "w")
+    finally:
+        solutions.close()
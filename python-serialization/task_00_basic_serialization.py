@@ -1,23 +1,174 @@
 #!/usr/bin/python3
-"""Basic JSON serialization/deserialization module."""
+"""Basic JSON serialization/deserialization module.
+
+Besides JSON, data can be saved in a compact binary format with
+``format="binary"``: a ``struct``-packed header followed by the value,
+where each value is a one-byte type tag, integers are zigzag varints,
+floats are 8-byte doubles and strings are length-prefixed UTF-8.
+"""
 
 
 import json
+import struct
+
+MAGIC = b"HBSF"
+VERSION = 1
+_HEADER = struct.Struct("<4sBB")
+_DOUBLE = struct.Struct("<d")
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT = range(9)
+
+
+def _write_varint(out, n):
+    """Append a non-negative integer as a little-endian base-128 varint."""
+    while n > 0x7F:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _encode(out, value):
+    """Append the binary encoding of a value to a bytearray."""
+    if value is None:
+        out.append(_NONE)
+    elif value is True or value is False:
+        out.append(_TRUE if value else _FALSE)
+    elif isinstance(value, int):
+        out.append(_INT)
+        _write_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+    elif isinstance(value, float):
+        out.append(_FLOAT)
+        out += _DOUBLE.pack(value)
+    elif isinstance(value, str):
+        raw = value.encode("utf-8")
+        out.append(_STR)
+        _write_varint(out, len(raw))
+        out += raw
+    elif isinstance(value, (bytes, bytearray)):
+        out.append(_BYTES)
+        _write_varint(out, len(value))
+        out += value
+    elif isinstance(value, (list, tuple)):
+        out.append(_LIST)
+        _write_varint(out, len(value))
+        for item in value:
+            _encode(out, item)
+    elif isinstance(value, dict):
+        out.append(_DICT)
+        _write_varint(out, len(value))
+        for key, item in value.items():
+            if key is not None and \
+                    not isinstance(key, (str, int, float, bool)):
+                raise TypeError("keys must be str, int, float, bool or "
+                                "None, not {}".format(type(key).__name__))
+            _encode(out, key)
+            _encode(out, item)
+    else:
+        raise TypeError("Object of type {} is not serializable".format(
+            type(value).__name__))
+
 
+def _read_varint(view, pos):
+    """Read a varint from a memoryview, returning (value, next position)."""
+    n = shift = 0
+    while True:
+        byte = view[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
 
-def serialize_and_save_to_file(data, filename):
+
+def _decode(view, pos):
+    """Decode the value at `pos` of a memoryview, without copying it first.
+
+    Returns:
+        A tuple (value, next position).
+    """
+    tag = view[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _INT:
+        n, pos = _read_varint(view, pos)
+        return (n >> 1) ^ -(n & 1), pos
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(view, pos)[0], pos + _DOUBLE.size
+    if tag in (_STR, _BYTES):
+        size, pos = _read_varint(view, pos)
+        chunk = view[pos:pos + size]
+        if len(chunk) != size:
+            raise ValueError("truncated binary data")
+        if tag == _STR:
+            return str(chunk, "utf-8"), pos + size
+        return bytes(chunk), pos + size
+    if tag == _LIST:
+        size, pos = _read_varint(view, pos)
+        items = []
+        for i in range(size):
+            item, pos = _decode(view, pos)
+            items.append(item)
+        return items, pos
+    if tag == _DICT:
+        size, pos = _read_varint(view, pos)
+        items = {}
+        for i in range(size):
+            key, pos = _decode(view, pos)
+            items[key], pos = _decode(view, pos)
+        return items, pos
+    raise ValueError("unknown type tag {}".format(tag))
+
+
+def serialize_and_save_to_file(data, filename, format="json"):
     """
     Serialize a Python dictionary into JSON format and save it to a file.
     The file will be overwritten if it already exists.
+
+    With format="binary", the compact binary format is used instead.
     """
+    if format == "binary":
+        out = bytearray(_HEADER.pack(MAGIC, VERSION, 0))
+        _encode(out, data)
+        with open(filename, "wb") as f:
+            f.write(out)
+        return
+    if format != "json":
+        raise ValueError("format must be 'json' or 'binary'")
     with open(filename, "w", encoding="utf-8") as f:
         json.dump(data, f)
 
 
-def load_and_deserialize(filename):
+def load_and_deserialize(filename, format="json"):
     """
     Load JSON data from a file and deserialize it
     back into a Python dictionary.
+
+    With format="binary", the file is read in the compact binary format
+    and decoded in place from a memoryview over its bytes.
     """
+    if format == "binary":
+        with open(filename, "rb") as f:
+            view = memoryview(f.read())
+        if len(view) < _HEADER.size:
+            raise ValueError("not a binary serialization file")
+        magic, version, flags = _HEADER.unpack_from(view)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("not a binary serialization file")
+        try:
+            data, pos = _decode(view, _HEADER.size)
+        except (IndexError, struct.error):
+            raise ValueError("truncated binary data")
+        except TypeError:
+            raise ValueError("malformed binary data")
+        if pos != len(view):
+            raise ValueError("trailing data after binary value")
+        return data
+    if format != "json":
+        raise ValueError("format must be 'json' or 'binary'")
     with open(filename, "r", encoding="utf-8") as f:
         return json.load(f)
@@ -1,8 +1,84 @@
 #!/usr/bin/python3
-"""Serialization and deserialization of a custom Python object using pickle."""
+"""Serialization and deserialization of a custom Python object using pickle.
 
+With protocol 5, large buffer attributes (bytes, bytearray, memoryview,
+or NumPy arrays) can be written out-of-band to a sidecar file named
+``<filename>.buffers`` and mapped back with ``mmap`` instead of copied.
+Files written out-of-band or by ``serialize_many`` have this layout:
+the pickled records, an index, then an 8-byte offset to that index.
+"""
 
+
+import mmap
+import os
 import pickle
+import struct
+
+OOB_MIN_SIZE = 1 << 16
+BUFFER_SUFFIX = ".buffers"
+BUFFER_ALIGN = 64
+_FOOTER = struct.Struct("<Q")
+
+
+def _write_records(objs, filename, out_of_band):
+    """Pickle objects one after another, followed by an offset index."""
+    records = []
+    layout = []
+    buffers = []
+    end = 0
+    with open(filename, "wb") as f:
+        for obj in objs:
+            found = []
+            data = pickle.dumps(obj, protocol=5,
+                                buffer_callback=(found.append
+                                                 if out_of_band else None))
+            records.append((f.tell(), len(data), len(layout), len(found)))
+            f.write(data)
+            for buf in found:
+                raw = buf.raw()
+                end += -end % BUFFER_ALIGN
+                layout.append((end, raw.nbytes))
+                buffers.append(raw)
+                end += raw.nbytes
+        index_offset = f.tell()
+        pickle.dump({"records": records, "buffers": layout}, f, protocol=5)
+        f.write(_FOOTER.pack(index_offset))
+    if out_of_band:
+        with open(filename + BUFFER_SUFFIX, "wb") as f:
+            for (offset, size), raw in zip(layout, buffers):
+                f.write(bytes(offset - f.tell()))
+                f.write(raw)
+
+
+def _read_records(filename, indexes=None):
+    """Load records by position, mapping their buffers from the sidecar."""
+    with open(filename, "rb") as f:
+        f.seek(-_FOOTER.size, os.SEEK_END)
+        index_offset, = _FOOTER.unpack(f.read(_FOOTER.size))
+        f.seek(index_offset)
+        index = pickle.load(f)
+        layout = index["buffers"]
+        view = None
+        if layout and sum(size for offset, size in layout):
+            with open(filename + BUFFER_SUFFIX, "rb") as bf:
+                view = memoryview(mmap.mmap(bf.fileno(), 0,
+                                            access=mmap.ACCESS_COPY))
+        elif layout:
+            view = memoryview(b"")
+        records = index["records"]
+        if indexes is None:
+            indexes = range(len(records))
+        objs = []
+        for i in indexes:
+            if not 0 <= i < len(records):
+                raise IndexError("record index out of range")
+            offset, size, first, count = records[i]
+            f.seek(offset)
+            data = f.read(size)
+            buffers = [view[start:start + length]
+                       for start, length in layout[first:first + count]]
+            objs.append(pickle.loads(data, buffers=buffers))
+        return objs
 
 
 class CustomObject:
@@ -19,22 +95,81 @@ class CustomObject:
         print(f"Age: {self.age}")
         print(f'Is Student: {self.is_student}')
 
-    def serialize(self, filename):
-        """Serialize the current instance to a file using pickle."""
+    def __reduce_ex__(self, protocol):
+        """Offer large buffer attributes to pickle out-of-band."""
+        if protocol < 5:
+            return super().__reduce_ex__(protocol)
+        state = {}
+        for key, value in self.__dict__.items():
+            if (isinstance(value, (bytes, bytearray, memoryview)) and
+                    memoryview(value).nbytes >= OOB_MIN_SIZE):
+                value = pickle.PickleBuffer(value)
+            state[key] = value
+        return (object.__new__, (type(self),), state)
+
+    def serialize(self, filename, out_of_band=False):
+        """Serialize the current instance to a file using pickle.
+
+        With out_of_band=True, protocol 5 is used and large buffers go
+        to the sidecar file instead of the pickle stream.
+        """
         try:
+            if out_of_band:
+                _write_records([self], filename, True)
+                return
             with open(filename, "wb") as f:
                 pickle.dump(self, f)
         except (OSError, pickle.PickleError):
             return None
 
     @classmethod
-    def deserialize(cls, filename):
-        """Deserialize a CustomObject instance from a file using pickle."""
+    def deserialize(cls, filename, out_of_band=False):
+        """Deserialize a CustomObject instance from a file using pickle.
+
+        With out_of_band=True, buffers are loaded from the sidecar file
+        as memoryviews over a copy-on-write mapping.
+        """
         try:
+            if out_of_band:
+                obj = _read_records(filename, [0])[0]
+                return obj if isinstance(obj, cls) else None
             with open(filename, "rb") as f:
                 obj = pickle.load(f)
                 if isinstance(obj, cls):
                     return obj
                 return None
-        except (OSError, pickle.PickleError, EOFError):
+        except (OSError, pickle.PickleError, EOFError, struct.error,
+                IndexError, KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def serialize_many(objs, filename, out_of_band=False):
+        """Serialize many objects into one file with an offset index.
+
+        Returns:
+            True on success, None on error.
+        """
+        try:
+            _write_records(objs, filename, out_of_band)
+            return True
+        except (OSError, pickle.PickleError):
+            return None
+
+    @staticmethod
+    def deserialize_many(filename, indexes=None):
+        """Load objects written by serialize_many.
+
+        Args:
+            filename (str): File written by serialize_many.
+            indexes (iterable): Positions of the objects to load, from
+                0, read by random access; all of them when None.
+
+        Returns:
+            The list of objects, or None on error, including an index
+            out of range or a corrupt file.
+        """
+        try:
+            return _read_records(filename, indexes)
+        except (OSError, pickle.PickleError, EOFError, struct.error,
+                IndexError, KeyError, TypeError, ValueError):
             return None
@@ -3,15 +3,74 @@
 
 
 import csv
+import itertools
 import json
+import math
+import os
+import re
+import shutil
+import tempfile
 
+INT_RE = re.compile(r"-?(?:0|[1-9][0-9]*)")
+FLOAT_RE = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][-+]?[0-9]+)?")
 
-def convert_csv_to_json(csv_filename):
+
+def is_number(value, pattern):
+    """
+    Tell whether a CSV value is a number matching `pattern`; values such
+    as 1e999, which would overflow to infinity, are not.
+    """
+    return (isinstance(value, str) and pattern.fullmatch(value) is not None
+            and (pattern is INT_RE or math.isfinite(float(value))))
+
+
+def infer_types(rows, fieldnames):
+    """
+    Pick a converter for each column from a sample of rows.
+
+    A column is int or float when all its non-empty sampled values are
+    finite JSON numbers; empty values in such a column become None.
+
+    Returns:
+        dict: column name -> converter, for numeric columns only.
+    """
+    converters = {}
+    for name in fieldnames:
+        values = [row[name] for row in rows if row.get(name)]
+        if not values or not all(is_number(v, FLOAT_RE) for v in values):
+            continue
+        kind = int if all(INT_RE.fullmatch(v) for v in values) else float
+        pattern = INT_RE if kind is int else FLOAT_RE
+
+        def convert(value, kind=kind, pattern=pattern):
+            if value == "":
+                return None
+            if is_number(value, pattern):
+                return kind(value)
+            return value
+        converters[name] = convert
+    return converters
+
+
+def convert_csv_to_json(csv_filename, json_filename="data.json", indent=4,
+                        jsonl=False, infer=False, sample_size=1000):
     """
     Convert a CSV file to JSON and write to data.json.
 
+    Rows are written one by one as they are read, so the CSV is never
+    held in memory whole; the output replaces json_filename only once
+    it is complete.
+
     Args:
         csv_filename (str): Path to the CSV file.
+        json_filename (str): Path to the JSON file to write.
+        indent (int): Indentation of the JSON array, or None for
+            compact output.
+        jsonl (bool): Write one compact JSON object per line instead
+            of an array.
+        infer (bool): Convert numeric columns, guessed from the first
+            sample_size rows, to numbers instead of strings.
+        sample_size (int): Number of rows used to infer column types.
 
     Returns:
         bool: True if successful, False otherwise.
@@ -19,12 +78,56 @@ def convert_csv_to_json(csv_filename):
     try:
         with open(csv_filename, mode="r", encoding="utf-8") as csv_file:
             reader = csv.DictReader(csv_file)
-            data_list = [row for row in reader]
-
-        with open("data.json", mode="w", encoding="utf-8") as json_file:
-            json.dump(data_list, json_file, indent=4)
+            rows = iter(reader)
+            converters = {}
+            if infer:
+                sample = list(itertools.islice(rows, sample_size))
+                converters = infer_types(sample, reader.fieldnames or [])
+                rows = itertools.chain(sample, rows)
 
+            directory = os.path.dirname(os.path.abspath(json_filename))
+            fd, tmp_name = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with open(fd, mode="w", encoding="utf-8") as json_file:
+                    write_rows(json_file, rows, converters, indent, jsonl)
+                if os.path.exists(json_filename):
+                    shutil.copymode(json_filename, tmp_name)
+                else:
+                    umask = os.umask(0)
+                    os.umask(umask)
+                    os.chmod(tmp_name, 0o666 & ~umask)
+                os.replace(tmp_name, json_filename)
+            except BaseException:
+                os.unlink(tmp_name)
+                raise
         return True
 
-    except (FileNotFoundError, IOError):
+    except OSError:
         return False
+
+
+def write_rows(json_file, rows, converters, indent, jsonl):
+    """Write rows as a JSON array (formatted like json.dump) or JSONL."""
+    compact = (",", ":")
+    if jsonl:
+        for row in rows:
+            for name, convert in converters.items():
+                row[name] = convert(row[name])
+            json_file.write(json.dumps(row, separators=compact))
+            json_file.write("\n")
+        return
+
+    if indent is None:
+        separators, start, sep, end, pad = compact, "[", ",", "]", ""
+    else:
+        pad = "\n" + " " * indent
+        separators, start, sep, end = None, "[" + pad, "," + pad, "\n]"
+    first = True
+    for row in rows:
+        for name, convert in converters.items():
+            row[name] = convert(row[name])
+        text = json.dumps(row, indent=indent, separators=separators)
+        json_file.write(start if first else sep)
+        json_file.write(text.replace("\n", pad) if pad else text)
+        first = False
+    json_file.write("[]" if first else end)
@@ -2,14 +2,67 @@
 # 100-matrix_mul.py
 # ABDULAZIZ ALRSHEDI <11937@holbertonschool.com>
 """Defines a matrix multiplication function."""
+from concurrent.futures import ProcessPoolExecutor
+from operator import mul
+from matrix_validation import (matrix_fault, NOT_LIST, NOT_LIST_OF_LISTS,
+                               NOT_NUMBERS, RAGGED)
 
+BLOCK_SIZE = 64
+"""int: The number of columns of m_b multiplied per tile."""
 
-def matrix_mul(m_a, m_b):
+PARALLEL_MIN_MULS = 2000000
+"""int: Products with fewer scalar multiplications skip the process pool."""
+
+_worker_cols_b = None
+
+FAULT_MESSAGES = {
+    NOT_LIST: "{} must be a list",
+    NOT_LIST_OF_LISTS: "{} must be a list of lists",
+    NOT_NUMBERS: "{} should contain only integers or floats",
+    RAGGED: "each row of {} must should be of the same size",
+}
+
+
+def multiply_band(rows, cols_b):
+    """Multiply a band of rows by a matrix given as column tuples.
+
+    Args:
+        rows (list of lists of ints/floats): The rows of the left matrix.
+        cols_b (list of tuples): The columns of the right matrix.
+    Returns:
+        The rows of the product, in order.
+    """
+    band = [[] for row in rows]
+    for start in range(0, len(cols_b), BLOCK_SIZE):
+        tile = cols_b[start:start + BLOCK_SIZE]
+        for row, new_row in zip(rows, band):
+            new_row.extend([sum(map(mul, row, col)) for col in tile])
+    return band
+
+
+def _init_worker(cols_b):
+    """Keep the columns of m_b in a pool worker for all its bands."""
+    global _worker_cols_b
+    _worker_cols_b = cols_b
+
+
+def _multiply_worker_band(rows):
+    """Multiply a band of rows by the columns held by this worker."""
+    return multiply_band(rows, _worker_cols_b)
+
+
+def matrix_mul(m_a, m_b, workers=1):
     """Multiply two matrices.
 
+    With `workers` greater than 1, large products are computed by a pool
+    of processes: m_b is shipped once to each worker through the pool
+    initializer and bands of m_a's rows are multiplied in parallel.
+    Products below PARALLEL_MIN_MULS multiplications stay in-process.
+
     Args:
         m_a (list of lists of ints/floats): The first matrix.
         m_b (list of lists of ints/floats): The second matrix.
+        workers (int): The number of worker processes to use.
     Raises:
         TypeError: If either m_a or m_b is not a list of lists of ints/floats.
         TypeError: If either m_a or m_b is empty.
@@ -24,46 +77,33 @@ def matrix_mul(m_a, m_b):
     if m_b == [] or m_b == [[]]:
         raise ValueError("m_b can't be empty")
 
-    if not isinstance(m_a, list):
-        raise TypeError("m_a must be a list")
-    if not isinstance(m_b, list):
-        raise TypeError("m_b must be a list")
-
-    if not all(isinstance(row, list) for row in m_a):
-        raise TypeError("m_a must be a list of lists")
-    if not all(isinstance(row, list) for row in m_b):
-        raise TypeError("m_b must be a list of lists")
-
-    if not all((isinstance(ele, int) or isinstance(ele, float))
-               for ele in [num for row in m_a for num in row]):
-        raise TypeError("m_a should contain only integers or floats")
-    if not all((isinstance(ele, int) or isinstance(ele, float))
-               for ele in [num for row in m_b for num in row]):
-        raise TypeError("m_b should contain only integers or floats")
-
-    if not all(len(row) == len(m_a[0]) for row in m_a):
-        raise TypeError("each row of m_a must should be of the same size")
-    if not all(len(row) == len(m_b[0]) for row in m_b):
-        raise TypeError("each row of m_b must should be of the same size")
+    # Each check is reported for m_a before m_b, so the lower fault wins
+    # and m_a wins a tie.
+    fault_a = matrix_fault(m_a)
+    fault_b = matrix_fault(m_b)
+    if fault_a and (not fault_b or fault_a <= fault_b):
+        raise TypeError(FAULT_MESSAGES[fault_a].format("m_a"))
+    if fault_b:
+        raise TypeError(FAULT_MESSAGES[fault_b].format("m_b"))
 
     if len(m_a[0]) != len(m_b):
         raise ValueError("m_a and m_b can't be multiplied")
 
-    inverted_b = []
-    for r in range(len(m_b[0])):
-        new_row = []
-        for c in range(len(m_b)):
-            new_row.append(m_b[c][r])
-        inverted_b.append(new_row)
+    # Transpose m_b once so each of its columns is a contiguous tuple,
+    # then walk it in tiles of BLOCK_SIZE columns so a tile stays hot
+    # while every row of m_a is multiplied against it.
+    cols_b = list(zip(*m_b))
+    if (workers <= 1 or len(m_a) < 2 or
+            len(m_a) * len(m_b) * len(cols_b) < PARALLEL_MIN_MULS):
+        return multiply_band(m_a, cols_b)
 
+    workers = min(workers, len(m_a))
+    size = -(-len(m_a) // (workers * 4))
+    bands = [m_a[i:i + size] for i in range(0, len(m_a), size)]
     new_matrix = []
-    for row in m_a:
-        new_row = []
-        for col in inverted_b:
-            prod = 0
-            for i in range(len(inverted_b[0])):
-                prod += row[i] * col[i]
-            new_row.append(prod)
-        new_matrix.append(new_row)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(cols_b,)) as pool:
+        for band in pool.map(_multiply_worker_band, bands):
+            new_matrix.extend(band)
 
     return new_matrix
@@ -1,19 +1,24 @@
 #!/usr/bin/python3
 # 101-lazy_matrix_mul.py
 # ABDULAZIZ ALRSHEDI <11937@holbertonschool.com>
-"""Defines a matrix multiplication function using NumPy."""
+"""Defines matrix multiplication functions using NumPy."""
 import numpy as np
 
 
-def lazy_matrix_mul(m_a, m_b):
+def lazy_matrix_mul(m_a, m_b, dtype=None, out=None):
     """Return the multiplication of two matrices.
 
+    Inputs that already are ndarrays (of the requested dtype) or expose the
+    buffer protocol are used as they are, without being copied.
+
     Args:
         m_a (list of lists of ints/floats): The first matrix.
         m_b (list of lists of ints/floats): The second matrix.
+        dtype (data-type): The type to compute in, guessed by NumPy if None.
+        out (ndarray): A preallocated array the result is written to.
     """
-    A = np.array(m_a)
-    B = np.array(m_b)
+    A = np.asarray(m_a, dtype=dtype)
+    B = np.asarray(m_b, dtype=dtype)
     
     if A.ndim != 2 or B.ndim != 2:
         raise TypeError("Scalar operands are not allowed, use '*' instead")
@@ -28,5 +33,39 @@ def lazy_matrix_mul(m_a, m_b):
         )
 
     # الآن استخدم matmul بأمان
-    return np.matmul(A, B)
+    return np.matmul(A, B, out=out)
+
+
+def lazy_matrix_mul_batch(m_a, m_b, dtype=None, out=None):
+    """Return the multiplications of two stacks of matrices, pair by pair.
+
+    All pairs are multiplied in a single `np.matmul` call.
+
+    Args:
+        m_a (sequence of matrices): The first matrix of each pair.
+        m_b (sequence of matrices): The second matrix of each pair.
+        dtype (data-type): The type to compute in, guessed by NumPy if None.
+        out (ndarray): A preallocated array the results are written to.
+    Returns:
+        An array whose i-th matrix is m_a[i] multiplied by m_b[i].
+    """
+    A = np.asarray(m_a, dtype=dtype)
+    B = np.asarray(m_b, dtype=dtype)
+
+    if A.ndim != 3 or B.ndim != 3:
+        raise ValueError("m_a and m_b must be stacks of matrices")
+
+    if A.shape[0] != B.shape[0]:
+        raise ValueError("m_a and m_b must hold the same number of matrices")
+
+    a_rows, a_cols = A.shape[1:]
+    b_rows, b_cols = B.shape[1:]
+
+    if a_cols != b_rows:
+        raise ValueError(
+            "shapes ({},{}) and ({},{}) not aligned: {} (dim 1) != {} (dim 0)"
+            .format(a_rows, a_cols, b_rows, b_cols, a_cols, b_rows)
+        )
+
+    return np.matmul(A, B, out=out)
     
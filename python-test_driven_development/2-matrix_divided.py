@@ -2,6 +2,7 @@
 # 2-matrix_divided.py
 # ABDULAZIZ ALRSHEDI <11937@holbertonschool.com>
 """Defines a matrix division function."""
+from matrix_validation import matrix_fault, RAGGED
 
 
 def matrix_divided(matrix, div):
@@ -18,14 +19,12 @@ def matrix_divided(matrix, div):
     Returns:
         A new matrix representing the result of the division.
     """
-    if (not isinstance(matrix, list) or matrix == [] or
-            not all(isinstance(row, list) for row in matrix) or
-            not all((isinstance(ele, int) or isinstance(ele, float))
-                    for ele in [num for row in matrix for num in row])):
+    fault = matrix_fault(matrix)
+    if matrix == [] or (fault and fault != RAGGED):
         raise TypeError("matrix must be a matrix (list of lists) of "
                         "integers/floats")
 
-    if not all(len(row) == len(matrix[0]) for row in matrix):
+    if fault == RAGGED:
         raise TypeError("Each row of the matrix must have the same size")
 
     if not isinstance(div, int) and not isinstance(div, float):
@@ -0,0 +1,53 @@
+#!/usr/bin/python3
+# matrix_validation.py
+# ABDULAZIZ ALRSHEDI <11937@holbertonschool.com>
+"""Defines a single-pass matrix validation function.
+
+Attributes:
+    NOT_LIST (int): The matrix is not a list.
+    NOT_LIST_OF_LISTS (int): A row of the matrix is not a list.
+    NOT_NUMBERS (int): An element of the matrix is not an int or float.
+    RAGGED (int): The rows of the matrix have different sizes.
+
+Lower codes take precedence over higher ones, matching the order in which
+the matrix functions report errors.
+"""
+
+NOT_LIST = 1
+NOT_LIST_OF_LISTS = 2
+NOT_NUMBERS = 3
+RAGGED = 4
+
+
+def matrix_fault(matrix):
+    """Return the highest-precedence problem with a matrix.
+
+    The rows are walked once and no flattened copy is built. The walk only
+    stops early on a row that is not a list, since nothing outranks it.
+
+    Args:
+        matrix (list): The matrix to check.
+    Returns:
+        0 if the matrix is a list of equally sized lists of ints/floats,
+        otherwise one of the fault codes of this module.
+    """
+    if not isinstance(matrix, list):
+        return (NOT_LIST)
+
+    fault = 0
+    width = None
+    for row in matrix:
+        if not isinstance(row, list):
+            return (NOT_LIST_OF_LISTS)
+        if fault == NOT_NUMBERS:
+            continue
+        for ele in row:
+            if not isinstance(ele, int) and not isinstance(ele, float):
+                fault = NOT_NUMBERS
+                break
+        else:
+            if width is None:
+                width = len(row)
+            elif len(row) != width and not fault:
+                fault = RAGGED
+    return (fault)